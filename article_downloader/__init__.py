@@ -0,0 +1 @@
+"""Shared code for the article and Q&A downloaders."""
@@ -0,0 +1,294 @@
+"""
+Shared helpers
+==============
+Config loading, HTTP session setup, progress tracking and file output used by
+downloader.py and the Q&A scripts in qa/.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# orjson is several times faster than the stdlib json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional HTTP/2 client, enabled with "http2": true in config
+try:
+    import httpx
+    import h2  # noqa: F401
+except ImportError:
+    httpx = None
+
+
+log = logging.getLogger(__name__)
+
+# Posts per page returned by the list API; a shorter page is the last one
+LIST_PAGE_SIZE = 20
+
+_ILLEGAL_RE = re.compile(r'[\\/*?:"<>|\n\r\t]')
+_WS_RE = re.compile(r'\s+')
+
+# O_BINARY keeps Windows from translating newlines
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+
+def start_logging(logger, verbose=False):
+    """Send log output through a queue so workers never block on stdout.
+
+    A background QueueListener thread does the actual writes; it is flushed at exit.
+    """
+    records = queue.SimpleQueue()
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = logging.handlers.QueueListener(records, handler)
+
+    # Only our own loggers: the root level is left alone so library INFO
+    # chatter (e.g. httpx's per-request lines) stays off stdout
+    queue_handler = logging.handlers.QueueHandler(records)
+    shared = logging.getLogger("article_downloader")
+    shared.addHandler(queue_handler)
+    shared.setLevel(logging.INFO)
+    logger.addHandler(queue_handler)
+    logger.setLevel(logging.DEBUG if verbose else logging.INFO)
+
+    listener.start()
+    atexit.register(listener.stop)
+
+
+def parse_json(data):
+    """Parse JSON text or bytes, via orjson when available."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def dump_json(obj, indent=True):
+    """Serialize to UTF-8 JSON bytes, via orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode("utf-8")
+
+
+def load_json(path):
+    """Read and parse a JSON file."""
+    with open(path, "rb") as f:
+        return parse_json(f.read())
+
+
+def load_config(config_file, required_paths=(), require_uid=True):
+    """Load and validate configuration. Exits with a message if something is missing."""
+    if not os.path.exists(config_file):
+        print(f"[Error] {config_file} not found.")
+        print("  Please copy config.example.json to config.json and fill in your settings.")
+        sys.exit(1)
+
+    config = load_json(config_file)
+
+    config["_cookies"] = {k: v for k, v in config.get("cookies", {}).items() if v}
+
+    if not config.get("base_url") or "example.com" in config["base_url"]:
+        print("[Error] 'base_url' must be set to the real target site URL.")
+        sys.exit(1)
+
+    if require_uid and not config.get("target_uid"):
+        print("[Error] 'target_uid' is required.")
+        sys.exit(1)
+
+    # Validate API paths
+    for key in required_paths:
+        if not config.get("api_paths", {}).get(key):
+            print(f"[Error] 'api_paths.{key}' is required.")
+            sys.exit(1)
+
+    return config
+
+
+def sanitize_filename(name, max_len=80):
+    """Sanitize filename by removing illegal characters."""
+    name = _ILLEGAL_RE.sub('_', name)
+    name = _WS_RE.sub(' ', name).strip()
+    return name[:max_len] if len(name) > max_len else name
+
+
+def load_progress(save_dir):
+    """Load the set of already downloaded IDs."""
+    path = os.path.join(save_dir, "_progress.jsonl")
+    legacy = os.path.join(save_dir, "_progress.json")
+
+    # One-time migration from the old single-JSON format
+    if not os.path.exists(path) and os.path.exists(legacy):
+        ids = load_json(legacy).get("downloaded", [])
+        with open(path, "wb") as f:
+            f.writelines(dump_json(i, indent=False) + b"\n" for i in ids)
+        os.remove(legacy)
+
+    if not os.path.exists(path):
+        return set()
+    with open(path, "rb") as f:
+        return {parse_json(line) for line in f if line.strip()}
+
+
+def save_progress(save_dir, item_id):
+    """Append one downloaded ID to the progress log."""
+    path = os.path.join(save_dir, "_progress.jsonl")
+    with open(path, "ab") as f:
+        f.write(dump_json(item_id, indent=False) + b"\n")
+
+
+class Throttle:
+    """Space out request starts shared by several worker threads."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def imap_bounded(pool, fn, items, window):
+    """Like pool.map, but keeps at most `window` calls in flight. Yields results in order."""
+    items = iter(items)
+    inflight = deque(pool.submit(fn, item) for item in islice(items, window))
+    while inflight:
+        # Refill only once the head is done, so `items` can react to its result
+        result = inflight.popleft().result()
+        for item in islice(items, 1):
+            inflight.append(pool.submit(fn, item))
+        yield result
+
+
+def create_session(config):
+    """Create an HTTP session with cookies and headers.
+
+    Returns an HTTP/2 httpx.Client when config["http2"] is set and httpx[http2]
+    is installed, otherwise a requests.Session.
+    """
+    base_url = config["base_url"]
+    xsrf = config["_cookies"].get("XSRF-TOKEN", "")
+    headers = {
+        "user-agent": (
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+            "(KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36"
+        ),
+        "x-xsrf-token": xsrf,
+        "referer": f"{base_url}/u/{config['target_uid']}",
+        "accept": "application/json, text/plain, */*",
+    }
+    proxy = config.get("proxy")
+    pool_size = config.get("pool_size", 32)
+
+    if config.get("http2"):
+        if httpx is not None:
+            # One multiplexed connection per host instead of a pool of HTTP/1.1 sockets
+            return httpx.Client(
+                http2=True,
+                headers=headers,
+                cookies=config["_cookies"],
+                proxy=proxy or None,
+                limits=httpx.Limits(max_connections=pool_size,
+                                    max_keepalive_connections=pool_size),
+                follow_redirects=True,
+                timeout=20,
+            )
+        log.warning("  [warn] 'http2' needs httpx[http2] installed, falling back to HTTP/1.1")
+
+    session = requests.Session()
+    session.cookies.update(config["_cookies"])
+
+    # Size the pool for concurrent workers and back off on throttling / transient 5xx
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(total=3, backoff_factor=0.5,
+                          status_forcelist=(429, 500, 502, 503, 504),
+                          raise_on_status=False),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    session.headers.update(headers)
+    if proxy:
+        session.proxies.update({"http": proxy, "https": proxy})
+
+    return session
+
+
+def write_files(target_dir, files):
+    """Write prepared {filename: bytes} payloads straight to file descriptors."""
+    for name, data in files.items():
+        fd = os.open(os.path.join(target_dir, name), _WRITE_FLAGS, 0o644)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+
+
+def fetch_list_page(session, url):
+    """Fetch one page of the user's post list. Raises on a non-200 response."""
+    r = session.get(url, timeout=15)
+    if r.status_code != 200:
+        raise RuntimeError(f"HTTP {r.status_code} for {url}")
+    return r.json().get("data", {}).get("list", [])
+
+
+def iter_list_pages(session, config, max_pages=200):
+    """Yield (page, items) from the user's post list API, in page order.
+
+    Keeps `list_prefetch` pages in flight instead of fetching strictly one by one, and
+    stops after the first empty or short page. Requests already in flight when that page
+    returns can't be recalled, so up to `list_prefetch - 1` extra pages may be requested.
+    Request errors propagate to the caller.
+    """
+    list_tpl = config["base_url"] + config["api_paths"]["api_articles"]
+    uid = config["target_uid"]
+    window = max(1, config.get("list_prefetch", 3))
+    throttle = Throttle(config.get("delay_between_pages", 1) / window)
+    # Lowest page seen coming back short; nothing past it is requested after that
+    last_page = [max_pages]
+    lock = threading.Lock()
+
+    def pages():
+        page = 1
+        while page <= last_page[0]:
+            yield page
+            page += 1
+
+    def fetch(page):
+        throttle.wait()
+        if page > last_page[0]:
+            return []
+        items = fetch_list_page(session, list_tpl.format(uid=uid, page=page))
+        if len(items) < LIST_PAGE_SIZE:
+            with lock:
+                last_page[0] = min(last_page[0], page)
+        return items
+
+    with ThreadPoolExecutor(max_workers=window) as pool:
+        for page, items in enumerate(imap_bounded(pool, fetch, pages(), window), 1):
+            yield page, items
+            if len(items) < LIST_PAGE_SIZE:
+                return
@@ -15,122 +15,68 @@ See README.md for detailed instructions.
 
 import requests
 from bs4 import BeautifulSoup
-import json
 import re
 import os
-import sys
-import time
+import string
 import argparse
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime
+from html import escape as html_escape, unescape as html_unescape
 from urllib.parse import urlparse
 
-
-CONFIG_FILE = "config.json"
-
-
-def load_config():
-    """Load configuration from config.json."""
-    if not os.path.exists(CONFIG_FILE):
-        print(f"[Error] {CONFIG_FILE} not found.")
-        print("  Please copy config.example.json to config.json and fill in your settings.")
-        sys.exit(1)
-
-    with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-        config = json.load(f)
-
-    config["_cookies"] = {k: v for k, v in config.get("cookies", {}).items() if v}
-
-    if not config.get("base_url") or "example.com" in config["base_url"]:
-        print("[Error] 'base_url' must be set to the real target site URL.")
-        sys.exit(1)
-
-    if not config.get("target_uid"):
-        print("[Error] 'target_uid' is required.")
-        sys.exit(1)
-
-    # Validate API paths
-    for key in ("api_profile", "api_articles", "article_page"):
-        if not config.get("api_paths", {}).get(key):
-            print(f"[Error] 'api_paths.{key}' is required.")
-            sys.exit(1)
-
-    return config
+from article_downloader.common import (
+    Throttle,
+    create_session,
+    dump_json,
+    imap_bounded,
+    iter_list_pages,
+    load_config,
+    load_progress,
+    sanitize_filename,
+    save_progress,
+    start_logging,
+    write_files,
+)
+
+# lxml is a C parser and much faster than the pure-Python html.parser
+try:
+    import lxml.html as lxml_html
+    HTML_PARSER = "lxml"
+except ImportError:
+    lxml_html = None
+    HTML_PARSER = "html.parser"
 
 
-def sanitize_filename(name, max_len=80):
-    """Sanitize filename by removing illegal characters."""
-    name = re.sub(r'[\\/*?:"<>|\n\r\t]', '_', name)
-    name = re.sub(r'\s+', ' ', name).strip()
-    return name[:max_len] if len(name) > max_len else name
-
-
-def load_progress(save_dir):
-    """Load download progress."""
-    path = os.path.join(save_dir, "_progress.json")
-    if os.path.exists(path):
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {"downloaded": []}
-
-
-def save_progress(save_dir, progress):
-    """Save download progress."""
-    path = os.path.join(save_dir, "_progress.json")
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(progress, f, ensure_ascii=False, indent=2)
-
-
-def create_session(config):
-    """Create a requests session with cookies and headers."""
-    session = requests.Session()
-    session.cookies.update(config["_cookies"])
-
-    base_url = config["base_url"]
-    xsrf = config["_cookies"].get("XSRF-TOKEN", "")
-
-    session.headers.update({
-        "user-agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-            "(KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36"
-        ),
-        "x-xsrf-token": xsrf,
-        "referer": f"{base_url}/u/{config['target_uid']}",
-        "accept": "application/json, text/plain, */*",
-    })
+CONFIG_FILE = "config.json"
 
-    proxy = config.get("proxy")
-    if proxy:
-        session.proxies.update({"http": proxy, "https": proxy})
+log = logging.getLogger("downloader")
 
-    return session
+# Article body is rendered client-side inside filterXSS("...")
+_FILTERXSS_RE = re.compile(r'filterXSS\("(.*?)"\s*(?:,|\))', re.DOTALL)
+_UNESCAPE_RE = re.compile(r'\\([/"\'])')
+_SURROGATE_ESCAPE_RE = re.compile(r'\\u[dD][89a-fA-F]')
+# First div whose class attribute mentions "title"; _TITLE_CLASS_RE then checks that
+# "title" is a whole class token, as soup.find("div", class_="title") requires
+_TITLE_DIV_RE = re.compile(r'<div\b([^>]*\bclass\s*=[^>]*title[^>]*)>(.*?)</div>', re.DOTALL | re.IGNORECASE)
+_TITLE_CLASS_RE = re.compile(r'''\b(?i:class)\s*=\s*(["'])(?:[^"']*\s)?title(?:\s[^"']*)?\1''')
+_TAG_RE = re.compile(r'<[^>]+>')
 
 
 def fetch_article_list(session, config, max_pages=200):
     """Fetch all articles from a user's profile via API."""
-    base_url = config["base_url"]
-    uid = config["target_uid"]
-    page_delay = config.get("delay_between_pages", 1)
-    api_tpl = config["api_paths"]["api_articles"]
+    page_tpl = config["base_url"] + config["api_paths"]["article_page"]
 
     all_articles = []
-    page = 1
-
-    while page <= max_pages:
-        url = base_url + api_tpl.format(uid=uid, page=page)
-        print(f"  Fetching page {page}...", end=" ")
-
-        try:
-            r = session.get(url, timeout=15)
-            if r.status_code != 200:
-                print(f"HTTP {r.status_code}")
-                break
-
-            data = r.json().get("data", {})
-            items = data.get("list", [])
+    append = all_articles.append
 
+    try:
+        for page, items in iter_list_pages(session, config, max_pages):
             if not items:
-                print("no more data")
-                break
+                log.info(f"  Page {page}: no more data")
+                continue
 
             count = 0
             for item in items:
@@ -140,10 +86,7 @@ def fetch_article_list(session, config, max_pages=200):
                     title = page_info.get("content1", "") or item.get("text_raw", "")[:50]
                     author = item.get("user", {}).get("screen_name", "")
 
-                    page_tpl = config["api_paths"]["article_page"]
-                    article_url = base_url + page_tpl.format(article_id=article_id)
-
-                    all_articles.append({
+                    append({
                         "article_id": article_id,
                         "title": title,
                         "author": author,
@@ -151,24 +94,46 @@ def fetch_article_list(session, config, max_pages=200):
                         "created_at": item.get("created_at", ""),
                         "summary": item.get("text_raw", ""),
                         "cover_pic": page_info.get("page_pic", ""),
-                        "page_url": article_url,
+                        "page_url": page_tpl.format(article_id=article_id),
                     })
                     count += 1
 
-            print(f"found {count} articles (of {len(items)} posts)")
+            log.info(f"  Page {page}: found {count} articles (of {len(items)} posts)")
+    except Exception as e:
+        log.warning(f"  Article list incomplete: {e}")
+    else:
+        log.info("  Reached last page")
+
+    return all_articles
 
-            if len(items) < 20:
-                print("  Reached last page")
-                break
 
-            page += 1
-            time.sleep(page_delay)
+def fetch_article(session, article, throttle, parse_pool=None):
+    """Fetch and parse an article page.
 
-        except Exception as e:
-            print(f"error: {e}")
-            break
+    Parsing runs in parse_pool (a process pool) when given, so it scales past the GIL.
+    Returns (status_code, content, error) so one failure doesn't stop the pipeline.
+    """
+    throttle.wait()
+    try:
+        r = session.get(article["page_url"], timeout=20)
+        if r.status_code != 200:
+            return r.status_code, None, None
+        if parse_pool is None:
+            return r.status_code, extract_article_content(r.text), None
+        return r.status_code, parse_pool.submit(extract_article_content, r.text).result(), None
+    except Exception as e:
+        return None, None, e
 
-    return all_articles
+
+def fast_title(html_text):
+    """Read the title from the standard page template without a DOM parse. None if not found."""
+    m = _TITLE_DIV_RE.search(html_text)
+    # Anything unusual (a "subtitle" div first, nested divs) is left to the DOM parse
+    if not m or not _TITLE_CLASS_RE.search(m.group(1)) or "<div" in m.group(2):
+        return None
+    # Strip each text run and join them, exactly like get_text(strip=True)
+    runs = (html_unescape(run).strip() for run in _TAG_RE.split(m.group(2)))
+    return "".join(run for run in runs if run)
 
 
 def extract_article_content(html_text):
@@ -180,30 +145,45 @@ def extract_article_content(html_text):
         "images": [],
     }
 
-    soup = BeautifulSoup(html_text, "html.parser")
+    # The outer page is only parsed when one of the fast paths below misses
+    soup = None
 
     # Title
-    title_el = soup.find("div", class_="title") or soup.find("h1")
-    if title_el:
-        result["title"] = title_el.get_text(strip=True)
-
-    # Content is rendered client-side inside filterXSS("...")
-    xss_match = re.search(r'filterXSS\("(.*?)"\s*(?:,|\))', html_text, re.DOTALL)
+    title = fast_title(html_text)
+    if title is None:
+        soup = BeautifulSoup(html_text, HTML_PARSER)
+        title_el = soup.find("div", class_="title") or soup.find("h1")
+        title = title_el.get_text(strip=True) if title_el else ""
+    result["title"] = title
+
+    xss_match = _FILTERXSS_RE.search(html_text)
     if xss_match:
         raw = xss_match.group(1)
         try:
-            html = raw.encode("utf-8").decode("unicode_escape")
+            # latin-1 + backslashreplace turns non-ASCII chars into \uXXXX escapes, so one
+            # unicode_escape pass decodes everything; it also consumes \" and \', leaving only \/
+            html = raw.encode("latin-1", "backslashreplace").decode("unicode_escape").replace("\\/", "/")
         except Exception:
-            html = raw
-        html = html.replace("\\" + "/", "/")
-        html = html.replace('\\"', '"')
-        html = html.replace("\\'", "'")
+            html = _UNESCAPE_RE.sub(r"\1", raw)
+        else:
+            if _SURROGATE_ESCAPE_RE.search(raw):
+                # Join \ud83d\ude00-style pairs (emoji) that unicode_escape leaves split;
+                # a lone surrogate (e.g. a truncated pair) becomes U+FFFD instead of failing
+                html = html.encode("utf-16", "surrogatepass").decode("utf-16", "replace")
         result["content_html"] = html
 
-        inner = BeautifulSoup(html, "html.parser")
-        result["content_text"] = inner.get_text("\n", strip=True)
+        if lxml_html is not None:
+            # Same output as get_text("\n", strip=True), but walked by lxml's C core
+            inner = lxml_html.fragment_fromstring(html, create_parent="div")
+            texts = inner.xpath(".//text()[not(ancestor::script or ancestor::style)]")
+            result["content_text"] = "\n".join(t for t in map(str.strip, texts) if t)
+            imgs = inner.iter("img")
+        else:
+            inner = BeautifulSoup(html, HTML_PARSER)
+            result["content_text"] = inner.get_text("\n", strip=True)
+            imgs = inner.find_all("img")
 
-        for img in inner.find_all("img"):
+        for img in imgs:
             src = img.get("src", img.get("data-src", ""))
             if src:
                 if src.startswith("//"):
@@ -213,6 +193,8 @@ def extract_article_content(html_text):
 
     # Fallback
     if not result["content_html"]:
+        if soup is None:
+            soup = BeautifulSoup(html_text, HTML_PARSER)
         div = soup.find("div", id="article_content") or soup.find("div", class_="article_content")
         if div and div.get_text(strip=True):
             result["content_html"] = str(div)
@@ -221,234 +203,292 @@ def extract_article_content(html_text):
     return result
 
 
-def download_images(session, images, img_dir):
-    """Download images to local directory."""
+def download_file(session, url, path, timeout=15):
+    """Stream a URL to disk in chunks. Returns False on a non-200 response.
+
+    The body goes to path + ".part" and is only renamed into place once complete.
+    """
+    if isinstance(session, requests.Session):
+        request = session.get(url, stream=True, timeout=timeout)
+    else:
+        request = session.stream("GET", url, timeout=timeout)
+
+    with request as r:
+        if r.status_code != 200:
+            return False
+        # requests and httpx name their chunk iterators differently
+        iter_chunks = getattr(r, "iter_content", None) or r.iter_bytes
+        part = path + ".part"
+        try:
+            with open(part, "wb") as f:
+                for chunk in iter_chunks(64 * 1024):
+                    f.write(chunk)
+        except BaseException:
+            # Never leave a truncated body behind; the article may be marked done
+            if os.path.exists(part):
+                os.remove(part)
+            raise
+    os.replace(part, path)
+    return True
+
+
+def download_images(session, images, img_dir, workers=8):
+    """Download images to local directory, several at a time."""
     if not images:
         return 0
     os.makedirs(img_dir, exist_ok=True)
-    count = 0
-    for idx, url in enumerate(images):
+
+    def fetch_one(job):
+        idx, url = job
         try:
             ext = os.path.splitext(urlparse(url).path)[1]
             if not ext or len(ext) > 5:
                 ext = ".jpg"
-            r = session.get(url, timeout=15)
-            if r.status_code == 200:
-                with open(os.path.join(img_dir, f"img_{idx:03d}{ext}"), "wb") as f:
-                    f.write(r.content)
-                count += 1
+            return download_file(session, url, os.path.join(img_dir, f"img_{idx:03d}{ext}"))
         except Exception as e:
-            print(f"    [image] failed #{idx}: {e}")
-    return count
+            log.debug(f"    [image] failed #{idx}: {e}")
+        return False
 
+    with ThreadPoolExecutor(max_workers=min(workers, len(images))) as pool:
+        return sum(pool.map(fetch_one, enumerate(images)))
 
-def save_article(article_info, content, save_dir, index):
-    """Save a single article to disk (HTML + TXT + metadata)."""
-    title = content.get("title") or article_info.get("title", f"article_{index}")
-    author = article_info.get("author", "")
-    created_at = article_info.get("created_at", "")
-    safe_title = sanitize_filename(title)
-    article_dir = os.path.join(save_dir, f"{index:03d}_{safe_title}")
-    os.makedirs(article_dir, exist_ok=True)
 
-    # HTML
-    html_out = f"""<!DOCTYPE html>
+ARTICLE_TEMPLATE = string.Template("""<!DOCTYPE html>
 <html lang="zh-CN">
 <head>
     <meta charset="utf-8">
-    <title>{title}</title>
+    <title>$title</title>
     <style>
-        body {{
+        body {
             max-width: 800px; margin: 40px auto; padding: 0 20px;
             font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto,
                          "Helvetica Neue", Arial, "PingFang SC", "Microsoft YaHei", sans-serif;
             line-height: 1.8; color: #333; background: #fff;
-        }}
-        h1 {{ font-size: 24px; margin-bottom: 10px; }}
-        .meta {{ color: #999; font-size: 13px; margin-bottom: 30px;
-                 padding-bottom: 15px; border-bottom: 1px solid #eee; }}
-        .article-body img {{ max-width: 100%; height: auto; margin: 10px 0; border-radius: 4px; }}
-        .article-body p {{ margin: 12px 0; }}
-        .footer {{ margin-top: 40px; padding-top: 15px; border-top: 1px solid #eee;
-                   color: #aaa; font-size: 12px; }}
+        }
+        h1 { font-size: 24px; margin-bottom: 10px; }
+        .meta { color: #999; font-size: 13px; margin-bottom: 30px;
+                 padding-bottom: 15px; border-bottom: 1px solid #eee; }
+        .article-body img { max-width: 100%; height: auto; margin: 10px 0; border-radius: 4px; }
+        .article-body p { margin: 12px 0; }
+        .footer { margin-top: 40px; padding-top: 15px; border-top: 1px solid #eee;
+                   color: #aaa; font-size: 12px; }
     </style>
 </head>
 <body>
-    <h1>{title}</h1>
+    <h1>$title</h1>
     <div class="meta">
-        {f'<span>Author: {author}</span>' if author else ''}
-        {f' | <span>Date: {created_at}</span>' if created_at else ''}
+        $author
+        $date
     </div>
     <div class="article-body">
-        {content.get('content_html', '<p>(empty)</p>')}
+        $body
     </div>
     <div class="footer">
-        <p>Downloaded: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+        <p>Downloaded: $downloaded</p>
     </div>
 </body>
-</html>"""
+</html>""")
+
+
+def save_article(article_info, content, save_dir, index):
+    """Save a single article to disk (HTML + TXT + metadata)."""
+    title = content.get("title") or article_info.get("title", f"article_{index}")
+    author = article_info.get("author", "")
+    created_at = article_info.get("created_at", "")
+    safe_title = sanitize_filename(title)
+    article_dir = os.path.join(save_dir, f"{index:03d}_{safe_title}")
+    os.makedirs(article_dir, exist_ok=True)
 
-    with open(os.path.join(article_dir, "article.html"), "w", encoding="utf-8") as f:
-        f.write(html_out)
+    # HTML
+    html_out = ARTICLE_TEMPLATE.substitute(
+        title=html_escape(title),
+        author=f'<span>Author: {html_escape(author)}</span>' if author else '',
+        date=f' | <span>Date: {html_escape(created_at)}</span>' if created_at else '',
+        body=content.get('content_html', '<p>(empty)</p>'),
+        downloaded=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+    )
 
     # TXT
-    with open(os.path.join(article_dir, "article.txt"), "w", encoding="utf-8") as f:
-        f.write(f"Title: {title}\n")
-        if author:
-            f.write(f"Author: {author}\n")
-        if created_at:
-            f.write(f"Date: {created_at}\n")
-        f.write("=" * 60 + "\n\n")
-        f.write(content.get("content_text", "(empty)"))
+    txt_out = f"Title: {title}\n"
+    if author:
+        txt_out += f"Author: {author}\n"
+    if created_at:
+        txt_out += f"Date: {created_at}\n"
+    txt_out += "=" * 60 + "\n\n" + content.get("content_text", "(empty)")
 
     # Metadata
-    with open(os.path.join(article_dir, "metadata.json"), "w", encoding="utf-8") as f:
-        json.dump({
-            "title": title,
-            "author": author,
-            "created_at": created_at,
-            "article_id": article_info.get("article_id", ""),
-            "content_length": len(content.get("content_text", "")),
-            "image_count": len(content.get("images", [])),
-        }, f, ensure_ascii=False, indent=2)
+    meta_out = dump_json({
+        "title": title,
+        "author": author,
+        "created_at": created_at,
+        "article_id": article_info.get("article_id", ""),
+        "content_length": len(content.get("content_text", "")),
+        "image_count": len(content.get("images", [])),
+    })
+
+    write_files(article_dir, {
+        "article.html": html_out.encode("utf-8"),
+        "article.txt": txt_out.encode("utf-8"),
+        "metadata.json": meta_out,
+    })
 
     return article_dir
 
 
 def main():
+    global CONFIG_FILE
     parser = argparse.ArgumentParser(description="Article Batch Downloader")
     parser.add_argument("--config", default=CONFIG_FILE, help="Path to config file")
     parser.add_argument("--list-only", action="store_true", help="List articles without downloading")
     parser.add_argument("--start", type=int, default=1, help="Start from Nth article")
     parser.add_argument("--no-images", action="store_true", help="Skip image downloads")
+    parser.add_argument("--verbose", action="store_true", help="Also log per-image failures")
     args = parser.parse_args()
 
-    global CONFIG_FILE
     CONFIG_FILE = args.config
+    start_logging(log, args.verbose)
 
-    config = load_config()
+    config = load_config(CONFIG_FILE, required_paths=("api_profile", "api_articles", "article_page"))
 
     uid = config["target_uid"]
     save_dir = config.get("save_dir", "./output")
     delay = config.get("delay_between_articles", 2)
+    concurrency = max(1, config.get("concurrency", 4))
+    image_workers = max(1, config.get("image_concurrency", 8))
 
     os.makedirs(save_dir, exist_ok=True)
 
-    print("=" * 60)
-    print("  Article Batch Downloader")
-    print("=" * 60)
-    print(f"  Target   : {uid}")
-    print(f"  Output   : {save_dir}")
-    print(f"  Proxy    : {config.get('proxy') or 'none'}")
-    print("=" * 60)
+    log.info("=" * 60)
+    log.info("  Article Batch Downloader")
+    log.info("=" * 60)
+    log.info(f"  Target   : {uid}")
+    log.info(f"  Output   : {save_dir}")
+    log.info(f"  Proxy    : {config.get('proxy') or 'none'}")
+    log.info(f"  Workers  : {concurrency}")
+    log.info("=" * 60)
 
     session = create_session(config)
 
     # 1. Verify
-    print("\n[1/4] Verifying login status...")
+    log.info("\n[1/4] Verifying login status...")
     try:
         url = config["base_url"] + config["api_paths"]["api_profile"].format(uid=uid)
         r = session.get(url, timeout=10)
         if r.status_code == 200:
             user = r.json().get("data", {}).get("user", {})
-            print(f"  OK - target user: {user.get('screen_name', 'unknown')}")
+            log.info(f"  OK - target user: {user.get('screen_name', 'unknown')}")
         else:
-            print(f"  FAILED (HTTP {r.status_code}) - cookies may have expired")
+            log.warning(f"  FAILED (HTTP {r.status_code}) - cookies may have expired")
             return
     except Exception as e:
-        print(f"  FAILED: {e}")
+        log.warning(f"  FAILED: {e}")
         return
 
     # 2. List
-    print(f"\n[2/4] Fetching article list...")
+    log.info(f"\n[2/4] Fetching article list...")
     articles = fetch_article_list(session, config)
 
     if not articles:
-        print("  No articles found!")
+        log.info("  No articles found!")
         return
 
-    seen = set()
-    articles = [a for a in articles if not (a["article_id"] in seen or seen.add(a["article_id"]))]
+    # The same article can be shared by several posts; keep its first occurrence
+    by_id = {}
+    for a in articles:
+        by_id.setdefault(a["article_id"], a)
+    articles = list(by_id.values())
 
-    print(f"\n  Found {len(articles)} articles")
+    log.info(f"\n  Found {len(articles)} articles")
 
-    with open(os.path.join(save_dir, "_article_list.json"), "w", encoding="utf-8") as f:
-        json.dump(articles, f, ensure_ascii=False, indent=2)
+    write_files(save_dir, {"_article_list.json": dump_json(articles)})
 
     for i, a in enumerate(articles, 1):
         d = a["created_at"][:16] if a["created_at"] else "unknown"
-        print(f"    {i:3d}. [{d}] {a['title'][:55]}")
+        log.info(f"    {i:3d}. [{d}] {a['title'][:55]}")
 
     if args.list_only:
-        print("\n  (list-only mode)")
+        log.info("\n  (list-only mode)")
         return
 
     # 3. Download
-    progress = load_progress(save_dir)
-    done_ids = set(progress.get("downloaded", []))
+    done_ids = load_progress(save_dir)
 
-    print(f"\n[3/4] Downloading articles...")
+    log.info(f"\n[3/4] Downloading articles...")
     success = fail = skip = 0
     total = len(articles)
 
+    pending = []
     for idx, article in enumerate(articles, 1):
         if idx < args.start:
             skip += 1
             continue
         if article["article_id"] in done_ids:
-            print(f"  [{idx}/{total}] skipped: {article['title'][:40]}")
+            log.info(f"  [{idx}/{total}] skipped: {article['title'][:40]}")
             skip += 1
             continue
-
-        print(f"\n  [{idx}/{total}] {article['title'][:55]}")
-
-        try:
-            r = session.get(article["page_url"], timeout=20)
-            if r.status_code != 200:
-                print(f"    FAILED: HTTP {r.status_code}")
+        pending.append((idx, article))
+
+    # Page fetches overlap across workers; the per-article delay is spread over them
+    throttle = Throttle(delay / concurrency)
+
+    # Parsing is CPU-bound; spread it over processes fed by the fetch workers.
+    # "spawn" because forking while worker threads are running is unsafe.
+    parse_workers = config.get("parse_workers", min(concurrency, os.cpu_count() or 1))
+    if parse_workers > 1:
+        parse_ctx = ProcessPoolExecutor(max_workers=parse_workers,
+                                        mp_context=multiprocessing.get_context("spawn"))
+    else:
+        parse_ctx = nullcontext()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool, parse_ctx as parse_pool:
+        fetched = imap_bounded(pool, lambda job: fetch_article(session, job[1], throttle, parse_pool),
+                               pending, concurrency * 2)
+
+        for (idx, article), (status, content, error) in zip(pending, fetched):
+            log.info(f"\n  [{idx}/{total}] {article['title'][:55]}")
+
+            try:
+                if error:
+                    raise error
+                if status != 200:
+                    log.warning(f"    FAILED: HTTP {status}")
+                    fail += 1
+                    continue
+
+                log.info(f"    content: {len(content.get('content_text', ''))} chars, "
+                         f"{len(content.get('images', []))} images")
+
+                article_dir = save_article(article, content, save_dir, idx)
+
+                if not args.no_images and content.get("images"):
+                    n = download_images(session, content["images"], os.path.join(article_dir, "images"),
+                                        workers=image_workers)
+                    log.info(f"    images: {n}/{len(content['images'])}")
+
+                if article.get("cover_pic"):
+                    try:
+                        download_file(session, article["cover_pic"],
+                                      os.path.join(article_dir, "cover.jpg"), timeout=10)
+                    except Exception:
+                        pass
+
+                log.info(f"    saved: {article_dir}")
+                success += 1
+                save_progress(save_dir, article["article_id"])
+
+            except Exception as e:
+                log.warning(f"    FAILED: {e}")
                 fail += 1
-                continue
-
-            content = extract_article_content(r.text)
-            print(f"    content: {len(content.get('content_text', ''))} chars, "
-                  f"{len(content.get('images', []))} images")
-
-            article_dir = save_article(article, content, save_dir, idx)
-
-            if not args.no_images and content.get("images"):
-                n = download_images(session, content["images"], os.path.join(article_dir, "images"))
-                print(f"    images: {n}/{len(content['images'])}")
-
-            if article.get("cover_pic"):
-                try:
-                    cr = session.get(article["cover_pic"], timeout=10)
-                    if cr.status_code == 200:
-                        with open(os.path.join(article_dir, "cover.jpg"), "wb") as f:
-                            f.write(cr.content)
-                except Exception:
-                    pass
-
-            print(f"    saved: {article_dir}")
-            success += 1
-            progress["downloaded"].append(article["article_id"])
-            save_progress(save_dir, progress)
-
-        except Exception as e:
-            print(f"    FAILED: {e}")
-            fail += 1
-
-        if idx < total:
-            time.sleep(delay)
 
     # 4. Summary
-    print(f"\n{'='*60}")
-    print(f"  [4/4] Done!")
-    print(f"{'='*60}")
-    print(f"  Success : {success}")
-    print(f"  Failed  : {fail}")
-    print(f"  Skipped : {skip}")
-    print(f"  Output  : {save_dir}")
-    print(f"{'='*60}")
+    log.info(f"\n{'='*60}")
+    log.info(f"  [4/4] Done!")
+    log.info(f"{'='*60}")
+    log.info(f"  Success : {success}")
+    log.info(f"  Failed  : {fail}")
+    log.info(f"  Skipped : {skip}")
+    log.info(f"  Output  : {save_dir}")
+    log.info(f"{'='*60}")
 
 
 if __name__ == "__main__":
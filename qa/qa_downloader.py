@@ -11,124 +11,52 @@ Usage:
     python qa/qa_downloader.py --list-only
 """
 
-import requests
 from bs4 import BeautifulSoup
-import json
-import re
 import os
 import sys
 import time
 import argparse
 from datetime import datetime
 
-# Config is in parent directory
-CONFIG_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.json")
-
-
-def load_config():
-    """Load configuration from config.json in project root."""
-    if not os.path.exists(CONFIG_FILE):
-        print(f"[Error] {CONFIG_FILE} not found.")
-        print("  Please copy config.example.json to config.json and fill in your settings.")
-        sys.exit(1)
-
-    with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-        config = json.load(f)
-
-    config["_cookies"] = {k: v for k, v in config.get("cookies", {}).items() if v}
-
-    if not config.get("base_url") or "example.com" in config["base_url"]:
-        print("[Error] 'base_url' must be set to the real target site URL.")
-        sys.exit(1)
-
-    if not config.get("target_uid"):
-        print("[Error] 'target_uid' is required.")
-        sys.exit(1)
-
-    return config
-
-
-def sanitize_filename(name, max_len=80):
-    """Sanitize filename by removing illegal characters."""
-    name = re.sub(r'[\\/*?:"<>|\n\r\t]', '_', name)
-    name = re.sub(r'\s+', ' ', name).strip()
-    return name[:max_len] if len(name) > max_len else name
-
-
-def load_progress(save_dir):
-    """Load download progress."""
-    path = os.path.join(save_dir, "_progress.json")
-    if os.path.exists(path):
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {"downloaded": []}
-
-
-def save_progress(save_dir, progress):
-    """Save download progress."""
-    path = os.path.join(save_dir, "_progress.json")
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(progress, f, ensure_ascii=False, indent=2)
-
-
-def create_session(config):
-    """Create a requests session with cookies and headers."""
-    session = requests.Session()
-    session.cookies.update(config["_cookies"])
-
-    base_url = config["base_url"]
-    xsrf = config["_cookies"].get("XSRF-TOKEN", "")
-
-    session.headers.update({
-        "user-agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-            "(KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36"
-        ),
-        "x-xsrf-token": xsrf,
-        "referer": f"{base_url}/u/{config['target_uid']}",
-        "accept": "application/json, text/plain, */*",
-    })
-
-    proxy = config.get("proxy")
-    if proxy:
-        session.proxies.update({"http": proxy, "https": proxy})
-
-    return session
+# Config and shared helpers live in the parent directory
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+from article_downloader.common import (  # noqa: E402
+    create_session,
+    dump_json,
+    iter_list_pages,
+    load_config,
+    load_progress,
+    sanitize_filename,
+    save_progress,
+)
+
+# lxml is a C parser and much faster than the pure-Python html.parser
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+CONFIG_FILE = os.path.join(ROOT_DIR, "config.json")
 
 
 def fetch_qa_list(session, config, max_pages=200):
     """Fetch all Q&A items from the article list API."""
-    base_url = config["base_url"]
-    uid = config["target_uid"]
-    api_tpl = config["api_paths"]["api_articles"]
-    page_delay = config.get("delay_between_pages", 1)
-
-    all_qa = []
-    seen = set()
-    page = 1
-
-    while page <= max_pages:
-        url = base_url + api_tpl.format(uid=uid, page=page)
-        print(f"  Fetching page {page}...", end=" ")
-
-        try:
-            r = session.get(url, timeout=15)
-            if r.status_code != 200:
-                print(f"HTTP {r.status_code}")
-                break
+    qa_by_id = {}
 
-            items = r.json().get("data", {}).get("list", [])
+    try:
+        for page, items in iter_list_pages(session, config, max_pages):
             if not items:
-                print("no more data")
-                break
+                print(f"  Page {page}: no more data")
+                continue
 
             count = 0
             for item in items:
                 pi = item.get("page_info", {})
                 aid = pi.get("page_id", "")
-                if (pi.get("object_type") == "wenda" or pi.get("source_type") == "wenda") and aid not in seen:
-                    seen.add(aid)
-                    all_qa.append({
+                if (pi.get("object_type") == "wenda" or pi.get("source_type") == "wenda") and aid not in qa_by_id:
+                    qa_by_id[aid] = {
                         "id": aid,
                         "question": pi.get("content1", pi.get("page_desc", "")),
                         "questioner": pi.get("content3", ""),
@@ -136,26 +64,19 @@ def fetch_qa_list(session, config, max_pages=200):
                         "author": item.get("user", {}).get("screen_name", ""),
                         "date": item.get("created_at", ""),
                         "summary": item.get("text_raw", ""),
-                    })
+                    }
                     count += 1
 
-            print(f"found {count} Q&A (of {len(items)} posts)")
-
-            if len(items) < 20:
-                break
-            page += 1
-            time.sleep(page_delay)
-
-        except Exception as e:
-            print(f"error: {e}")
-            break
+            print(f"  Page {page}: found {count} Q&A (of {len(items)} posts)")
+    except Exception as e:
+        print(f"  Q&A list incomplete: {e}")
 
-    return all_qa
+    return list(qa_by_id.values())
 
 
 def extract_qa_content(html):
     """Extract Q&A content from the /p/ page HTML."""
-    soup = BeautifulSoup(html, "html.parser")
+    soup = BeautifulSoup(html, HTML_PARSER)
 
     result = {"question": "", "answer": ""}
 
@@ -239,17 +160,17 @@ def save_qa(qa_info, content, save_dir, index):
 
 
 def main():
+    global CONFIG_FILE
     parser = argparse.ArgumentParser(description="Q&A Downloader (requests-based)")
     parser.add_argument("--config", default=CONFIG_FILE, help="Path to config file")
     parser.add_argument("--list-only", action="store_true", help="List Q&A without downloading")
     parser.add_argument("--start", type=int, default=1, help="Start from Nth item")
     args = parser.parse_args()
 
-    global CONFIG_FILE
     if args.config != CONFIG_FILE:
         CONFIG_FILE = args.config
 
-    config = load_config()
+    config = load_config(CONFIG_FILE, required_paths=("api_profile", "api_articles"))
 
     base_url = config["base_url"]
     qa_page_tpl = config.get("api_paths", {}).get("qa_page", "/p/{qa_id}")
@@ -289,8 +210,8 @@ def main():
 
     print(f"\n  Found {len(qa_list)} Q&A items")
 
-    with open(os.path.join(save_dir, "_qa_list.json"), "w", encoding="utf-8") as f:
-        json.dump(qa_list, f, ensure_ascii=False, indent=2)
+    with open(os.path.join(save_dir, "_qa_list.json"), "wb") as f:
+        f.write(dump_json(qa_list))
 
     for i, q in enumerate(qa_list, 1):
         d = q["date"][:16] if q["date"] else "unknown"
@@ -301,8 +222,7 @@ def main():
         return
 
     # 3. Download
-    progress = load_progress(save_dir)
-    done_ids = set(progress.get("downloaded", []))
+    done_ids = load_progress(save_dir)
 
     print(f"\n[3/3] Downloading Q&A...")
     success = fail = skip = 0
@@ -333,8 +253,7 @@ def main():
             save_qa(qa, content, save_dir, idx)
             success += 1
 
-            progress["downloaded"].append(qa["id"])
-            save_progress(save_dir, progress)
+            save_progress(save_dir, qa["id"])
 
         except Exception as e:
             print(f"    FAILED: {e}")
@@ -2,51 +2,76 @@
 Q&A Unlock & Download (Playwright-based)
 ==========================================
 For paywalled Q&A that require browser interaction to unlock.
-Opens pages in parallel batches for speed.
+Keeps a bounded number of pages open in parallel for speed.
 
 Requires: playwright (pip install playwright && playwright install chromium)
 
 Usage:
     python qa/qa_unlock.py
     python qa/qa_unlock.py --batch-size 3
+    python qa/qa_unlock.py --persistent
 """
 
 import asyncio
 import json
+import logging
 import os
+import string
 import sys
-import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from playwright.async_api import async_playwright
-
-# Config is in parent directory
-CONFIG_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.json")
-
-
-def load_config():
-    """Load configuration from config.json in project root."""
-    if not os.path.exists(CONFIG_FILE):
-        print(f"[Error] {CONFIG_FILE} not found.")
-        print("  Please copy config.example.json to config.json and fill in your settings.")
-        sys.exit(1)
-
-    with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-        config = json.load(f)
-
-    config["_cookies"] = {k: v for k, v in config.get("cookies", {}).items() if v}
-
-    if not config.get("base_url") or "example.com" in config["base_url"]:
-        print("[Error] 'base_url' must be set to the real target site URL.")
-        sys.exit(1)
-
-    return config
-
-
-def sanitize_filename(name, max_len=80):
-    """Sanitize filename by removing illegal characters."""
-    name = re.sub(r'[\\/*?:"<>|\n\r\t]', '_', name)
-    name = re.sub(r'\s+', ' ', name).strip()
-    return name[:max_len] if len(name) > max_len else name
+from html import escape as html_escape
+from itertools import chain, islice
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError, async_playwright
+
+# Config and shared helpers live in the parent directory
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+from article_downloader.common import (  # noqa: E402
+    load_config,
+    load_json,
+    sanitize_filename,
+    start_logging,
+    write_files,
+)
+
+log = logging.getLogger("qa_unlock")
+
+CONFIG_FILE = os.path.join(ROOT_DIR, "config.json")
+
+# Answer containers, in order of preference
+ANSWER_SELECTORS = (
+    '.answer_con', '.answer_text', '[node-type="answer_content"]',
+    '[node-type="answer_text"]', '.main_answer .WB_text', '.main_answer', '.WB_answer_wrap',
+)
+UNLOCK_BUTTON = '[node-type="free_look_btn"]'
+QUESTION_SELECTOR = '.ask_con, [node-type="askTitle"]'
+# How long a parsed page gets for its scripts to add the unlock button
+BUTTON_GRACE_MS = 3000
+
+# Installed once per context; each page then extracts with a short __extractQA() call
+EXTRACT_QA_SCRIPT = """
+window.__extractQA = () => {
+    let answer = '';
+    for (const s of %s) {
+        const el = document.querySelector(s);
+        if (el) {
+            const t = el.innerText.trim();
+            if (t.length > 0) { answer = t; break; }
+        }
+    }
+    const q = document.querySelector(%s);
+    return {question: q ? q.innerText.trim() : '', answer: answer};
+};
+""" % (json.dumps(ANSWER_SELECTORS), json.dumps(QUESTION_SELECTOR))
+
+# qa.txt header/answer separator, and how much of each file end is read to find it
+QA_SEPARATOR = "=" * 60
+_HEAD_BYTES = 4096
+_TAIL_BYTES = 512
+
+# Resource types never needed to read the Q&A text
+BLOCKED_RESOURCES = frozenset({"image", "media", "font"})
 
 
 def is_already_good(qa_dir):
@@ -54,130 +79,212 @@ def is_already_good(qa_dir):
     txt = os.path.join(qa_dir, "qa.txt")
     if not os.path.exists(txt):
         return False
-    with open(txt, "r", encoding="utf-8") as f:
-        content = f.read()
-    parts = content.split("=" * 60)
+    with open(txt, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size > _TAIL_BYTES:
+            # Only the text after the last separator matters, so the file's tail usually decides
+            f.seek(size - _TAIL_BYTES)
+            tail = f.read().decode("utf-8", "ignore")
+            if QA_SEPARATOR in tail:
+                answer = tail.split(QA_SEPARATOR)[-1].strip()
+                return bool(answer) and answer != "(empty)"
+            f.seek(0)
+            if tail.strip() and QA_SEPARATOR.encode() in f.read(_HEAD_BYTES):
+                # Separator is further up: the answer is at least a whole tail long
+                return True
+            f.seek(0)
+        content = f.read().decode("utf-8")
+    parts = content.split(QA_SEPARATOR)
     answer = (parts[-1].strip() if len(parts) > 1 else "").strip()
     return bool(answer) and answer != "(empty)"
 
 
-async def process_one(context, config, idx, qa, qa_dir):
-    """Process a single Q&A: navigate, unlock, extract."""
-    os.makedirs(qa_dir, exist_ok=True)
-    title = qa["question"][:50]
-    page = await context.new_page()
-
-    try:
-        base_url = config["base_url"]
-        qa_page_tpl = config.get("api_paths", {}).get("qa_page", "/p/{qa_id}")
-        url = base_url + qa_page_tpl.format(qa_id=qa["id"])
-        print(f"  [{idx}] {title}")
+async def block_resources(route):
+    """Abort requests for images, media and fonts; let everything else through."""
+    if route.request.resource_type in BLOCKED_RESOURCES:
+        await route.abort()
+    else:
+        await route.continue_()
 
-        await page.goto(url, wait_until="domcontentloaded", timeout=20000)
-        await asyncio.sleep(3)
 
-        # Click unlock button if present
-        btn = page.locator('[node-type="free_look_btn"]')
-        if await btn.count() > 0:
-            await btn.click()
-            await asyncio.sleep(4)
-
-        # Extract answer (take any non-empty block; no minimum length)
-        answer_text = await page.evaluate("""
-            () => {
-                const sels = ['.answer_con', '.answer_text', '[node-type="answer_content"]',
-                    '[node-type="answer_text"]', '.main_answer .WB_text', '.main_answer', '.WB_answer_wrap'];
-                for (const s of sels) {
-                    const el = document.querySelector(s);
-                    if (el) {
-                        const t = el.innerText.trim();
-                        if (t.length > 0) return t;
-                    }
-                }
-                return '';
-            }
-        """)
-
-        question_text = await page.evaluate("""
-            () => {
-                const el = document.querySelector('.ask_con, [node-type="askTitle"]');
-                return el ? el.innerText.trim() : '';
-            }
-        """)
-
-        print(f"  [{idx}] answer: {len(answer_text)} chars")
-
-        # Save TXT
-        with open(os.path.join(qa_dir, "qa.txt"), "w", encoding="utf-8") as f:
-            f.write(f"Question: {question_text or qa['question']}\n")
-            if qa.get("questioner"):
-                f.write(f"Questioner: {qa['questioner']}\n")
-            if qa.get("price_info"):
-                f.write(f"Price: {qa['price_info']}\n")
-            if qa.get("date"):
-                f.write(f"Date: {qa['date']}\n")
-            f.write("=" * 60 + "\n\n")
-            f.write(answer_text or "(empty)")
-
-        # Save HTML
-        q = question_text or qa["question"]
-        html_out = f"""<!DOCTYPE html>
+QA_TEMPLATE = string.Template("""<!DOCTYPE html>
 <html lang="zh-CN">
 <head>
     <meta charset="utf-8">
-    <title>Q&A: {q[:100]}</title>
+    <title>Q&A: $title</title>
     <style>
-        body {{ max-width: 800px; margin: 40px auto; padding: 0 20px;
+        body { max-width: 800px; margin: 40px auto; padding: 0 20px;
                font-family: -apple-system, "PingFang SC", "Microsoft YaHei", sans-serif;
-               line-height: 1.8; color: #333; }}
-        .question {{ background: #f7f7f7; padding: 20px; border-radius: 8px; margin-bottom: 20px; }}
-        .question h2 {{ font-size: 18px; margin: 0 0 10px; }}
-        .meta {{ color: #999; font-size: 13px; }}
-        .answer {{ padding: 20px 0; }}
-        .footer {{ margin-top: 30px; padding-top: 15px; border-top: 1px solid #eee;
-                   color: #aaa; font-size: 12px; }}
+               line-height: 1.8; color: #333; }
+        .question { background: #f7f7f7; padding: 20px; border-radius: 8px; margin-bottom: 20px; }
+        .question h2 { font-size: 18px; margin: 0 0 10px; }
+        .meta { color: #999; font-size: 13px; }
+        .answer { padding: 20px 0; }
+        .footer { margin-top: 30px; padding-top: 15px; border-top: 1px solid #eee;
+                   color: #aaa; font-size: 12px; }
     </style>
 </head>
 <body>
     <div class="question">
-        <h2>{q}</h2>
+        <h2>$question</h2>
         <div class="meta">
-            {qa.get('questioner', '')} | {qa.get('price_info', '')} | {qa.get('date', '')}
+            $questioner | $price | $date
         </div>
     </div>
     <div class="answer">
-        <p>{'</p><p>'.join(answer_text.split(chr(10))) if answer_text else '(empty)'}</p>
+        <p>$body</p>
     </div>
     <div class="footer">
-        <p>Downloaded: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+        <p>Downloaded: $downloaded</p>
     </div>
 </body>
-</html>"""
-        with open(os.path.join(qa_dir, "qa.html"), "w", encoding="utf-8") as f:
-            f.write(html_out)
+</html>""")
+
+
+def iter_needs(qa_list, save_dir, url_tpl, chunk_size=64):
+    """Yield (idx, qa, qa_dir, url) for each Q&A that still needs unlocking.
+
+    save_dir is listed once; existing dirs are checked chunk by chunk on a thread pool.
+    """
+    existing = {e.name for e in os.scandir(save_dir) if e.is_dir()}
+    numbered = enumerate(qa_list, 1)
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        while True:
+            chunk = []
+            for idx, qa in islice(numbered, chunk_size):
+                safe_title = sanitize_filename(qa["question"][:60] or f"qa_{idx}")
+                dir_name = f"{idx:03d}_{safe_title}"
+                chunk.append((idx, qa, os.path.join(save_dir, dir_name), dir_name in existing))
+            if not chunk:
+                return
+
+            to_check = [qa_dir for _, _, qa_dir, exists in chunk if exists]
+            good = {qa_dir for qa_dir, ok in zip(to_check, pool.map(is_already_good, to_check)) if ok}
+            for idx, qa, qa_dir, _ in chunk:
+                if qa_dir not in good:
+                    yield idx, qa, qa_dir, url_tpl.format(qa_id=qa["id"])
+
+
+def _persist(qa_dir, txt_body, html_body):
+    """Write qa.txt and qa.html into qa_dir, one os.write per file."""
+    write_files(qa_dir, {
+        "qa.txt": txt_body.encode("utf-8"),
+        "qa.html": html_body.encode("utf-8"),
+    })
+
+
+async def process_one(page, writer, idx, qa, qa_dir, url):
+    """Process a single Q&A: navigate, unlock, extract."""
+    os.makedirs(qa_dir, exist_ok=True)
+    title = qa["question"][:50]
+
+    try:
+        log.info(f"  [{idx}] {title}")
+
+        await page.goto(url, wait_until="commit", timeout=20000)
+
+        # Readiness is gated on the unlock button, not the answer containers: locked pages
+        # show a preview in those too. Wait for the document to be parsed, then give page
+        # scripts a short grace period to add the button before taking the no-button path
+        await page.wait_for_load_state("domcontentloaded", timeout=20000)
+        btn = page.locator(UNLOCK_BUTTON)
+        try:
+            await btn.first.wait_for(state="attached", timeout=BUTTON_GRACE_MS)
+        except PlaywrightTimeoutError:
+            pass
+
+        # Click unlock button if present
+        if await btn.count() > 0:
+            # The button can go away before the unlocked text arrives, so wait for the
+            # answer itself to replace the locked preview
+            preview = (await page.evaluate("__extractQA()"))["answer"]
+            await btn.click()
+            try:
+                await page.wait_for_function(
+                    "(preview) => { const a = __extractQA().answer; return a.length > 0 && a !== preview; }",
+                    arg=preview, timeout=8000)
+            except PlaywrightTimeoutError:
+                pass
+
+        # Extract question and answer in one round-trip (any non-empty answer block; no minimum length)
+        result = await page.evaluate("__extractQA()")
+        question_text, answer_text = result["question"], result["answer"]
+
+        log.info(f"  [{idx}] answer: {len(answer_text)} chars")
+
+        # Build TXT
+        txt_lines = [f"Question: {question_text or qa['question']}\n"]
+        if qa.get("questioner"):
+            txt_lines.append(f"Questioner: {qa['questioner']}\n")
+        if qa.get("price_info"):
+            txt_lines.append(f"Price: {qa['price_info']}\n")
+        if qa.get("date"):
+            txt_lines.append(f"Date: {qa['date']}\n")
+        txt_lines.append(QA_SEPARATOR + "\n\n")
+        txt_lines.append(answer_text or "(empty)")
+        txt_body = "".join(txt_lines)
+
+        # Build HTML
+        q = question_text or qa["question"]
+        html_out = QA_TEMPLATE.substitute(
+            title=html_escape(q[:100]),
+            question=html_escape(q),
+            questioner=html_escape(qa.get('questioner') or ''),
+            price=html_escape(qa.get('price_info') or ''),
+            date=html_escape(qa.get('date') or ''),
+            body=html_escape(answer_text).replace('\n', '</p><p>') if answer_text else '(empty)',
+            downloaded=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        )
+
+        # Hand the files to the writer thread so the event loop keeps serving the other pages
+        await asyncio.get_running_loop().run_in_executor(writer, _persist, qa_dir, txt_body, html_out)
 
         return True
 
     except Exception as e:
-        print(f"  [{idx}] FAILED: {e}")
+        log.warning(f"  [{idx}] FAILED: {e}")
         return False
-    finally:
-        await page.close()
+
+
+async def worker(page, items, writer):
+    """Process queued Q&A on one page until the None sentinel arrives. Returns (success, fail)."""
+    success = fail = 0
+    while (item := await items.get()) is not None:
+        if page.is_closed():
+            page = await page.context.new_page()
+        if await process_one(page, writer, *item):
+            success += 1
+        else:
+            fail += 1
+    return success, fail
+
+
+async def feed(items, needs, workers):
+    """Move scan results onto the bounded queue, then stop each worker with a sentinel."""
+    # The scan touches the disk, so advance it off the event loop
+    while (item := await asyncio.to_thread(next, needs, None)) is not None:
+        await items.put(item)
+    for _ in range(workers):
+        await items.put(None)
 
 
 async def main():
+    global CONFIG_FILE
     import argparse
     parser = argparse.ArgumentParser(description="Q&A Unlock & Download (Playwright)")
     parser.add_argument("--config", default=CONFIG_FILE, help="Path to config file")
-    parser.add_argument("--batch-size", type=int, default=5, help="Parallel batch size")
+    parser.add_argument("--batch-size", type=int, default=5, help="Max pages open in parallel")
     parser.add_argument("--headless", action="store_true", help="Run browser in headless mode")
+    parser.add_argument("--persistent", action="store_true",
+                        help="Keep a browser profile (cookies, HTTP cache) in qa_save_dir/.pw_profile across runs")
     args = parser.parse_args()
+    start_logging(log)
 
-    global CONFIG_FILE
     if args.config != CONFIG_FILE:
         CONFIG_FILE = args.config
 
-    config = load_config()
+    # The unlock pass only visits pages from _qa_list.json, so no target_uid is needed
+    config = load_config(CONFIG_FILE, require_uid=False)
 
     save_dir = config.get("qa_save_dir", "./qa/output")
     qa_list_file = os.path.join(save_dir, "_qa_list.json")
@@ -187,76 +294,88 @@ async def main():
         print("  Run qa_downloader.py first to generate the Q&A list.")
         sys.exit(1)
 
-    with open(qa_list_file, "r", encoding="utf-8") as f:
-        qa_list = json.load(f)
+    qa_list = load_json(qa_list_file)
 
-    print("=" * 60)
-    print("  Q&A Unlock & Download (Playwright)")
-    print("=" * 60)
+    log.info("=" * 60)
+    log.info("  Q&A Unlock & Download (Playwright)")
+    log.info("=" * 60)
 
-    # Find items that need browser unlock
-    needs = []
-    for idx, qa in enumerate(qa_list, 1):
-        safe_title = sanitize_filename(qa["question"][:60] or f"qa_{idx}")
-        qa_dir = os.path.join(save_dir, f"{idx:03d}_{safe_title}")
-        if not is_already_good(qa_dir):
-            needs.append((idx, qa, qa_dir))
+    # Items needing unlock are streamed from the scan straight to the browser workers
+    url_tpl = config["base_url"] + config.get("api_paths", {}).get("qa_page", "/p/{qa_id}")
+    needs = iter_needs(qa_list, save_dir, url_tpl)
+    first = next(needs, None)
 
-    print(f"  Total: {len(qa_list)}, Need unlock: {len(needs)}")
-    if not needs:
-        print("  All Q&A already have full answers!")
+    log.info(f"  Total: {len(qa_list)}")
+    if first is None:
+        log.info("  All Q&A already have full answers!")
         return
+    needs = chain([first], needs)
 
     base_url = config["base_url"]
     domain = base_url.replace("https://", "").replace("http://", "").split("/")[0]
 
     async with async_playwright() as p:
-        launch_args = {"headless": args.headless}
-        browser = await p.chromium.launch(**launch_args)
-
         ctx_args = {}
         proxy = config.get("proxy")
         if proxy:
             ctx_args["proxy"] = {"server": proxy}
 
-        context = await browser.new_context(**ctx_args)
-
-        # Inject cookies
-        for name, value in config["_cookies"].items():
-            await context.add_cookies([{
+        browser = None
+        if args.persistent:
+            # One on-disk profile, so cookies and cached assets survive between runs
+            contexts = [await p.chromium.launch_persistent_context(
+                os.path.join(save_dir, ".pw_profile"), headless=args.headless, **ctx_args)]
+        else:
+            # A few contexts spread the pages over separate cookie stores / IPC channels
+            browser = await p.chromium.launch(headless=args.headless)
+            contexts = [await browser.new_context(**ctx_args) for _ in range(max(1, min(args.batch_size, 4)))]
+
+        try:
+            cookies = [{
                 "name": name, "value": value,
                 "domain": f".{domain}", "path": "/",
-            }])
-
-        print(f"  Browser launched, cookies injected\n")
-
-        success = fail = 0
-        total = len(needs)
-        batch_size = args.batch_size
-
-        for batch_start in range(0, total, batch_size):
-            batch = needs[batch_start:batch_start + batch_size]
-            print(f"  --- Batch {batch_start // batch_size + 1} ({len(batch)} items) ---")
-
-            tasks = [process_one(context, config, idx, qa, qa_dir) for idx, qa, qa_dir in batch]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            for r in results:
-                if isinstance(r, Exception):
-                    fail += 1
-                elif r:
-                    success += 1
-                else:
-                    fail += 1
-
-            await asyncio.sleep(2)
-
-        await browser.close()
-
-    print(f"\n{'='*60}")
-    print(f"  Done! Success: {success}, Failed: {fail}")
-    print(f"{'='*60}")
+            } for name, value in config["_cookies"].items()]
+            for context in contexts:
+                await context.route("**/*", block_resources)
+                await context.add_init_script(EXTRACT_QA_SCRIPT)
+                # A persistent profile usually has them already
+                current = {(c["name"], c["value"]) for c in await context.cookies(base_url)}
+                if any((c["name"], c["value"]) not in current for c in cookies):
+                    await context.add_cookies(cookies)
+
+            log.info(f"  Browser launched, {len(contexts)} contexts, cookies ready\n")
+
+            # One worker per page (round-robin over the contexts), each reusing its page;
+            # a slow page no longer holds up the rest
+            pages = [await contexts[i % len(contexts)].new_page() for i in range(args.batch_size)]
+
+            # Bounded queue: the scan stays only a little ahead of the browser
+            items = asyncio.Queue(maxsize=args.batch_size * 2)
+
+            # One dedicated thread does all the disk writes, in completion order
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="qa-writer") as writer:
+                _, *counts = await asyncio.gather(
+                    feed(items, needs, len(pages)),
+                    *(worker(page, items, writer) for page in pages),
+                )
+
+            success = sum(ok for ok, _ in counts)
+            fail = sum(failed for _, failed in counts)
+        finally:
+            # Closing a context also closes its pages
+            for context in contexts:
+                await context.close()
+            if browser is not None:
+                await browser.close()
+
+    log.info(f"\n{'='*60}")
+    log.info(f"  Done! Need unlock: {success + fail}, Success: {success}, Failed: {fail}")
+    log.info(f"{'='*60}")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        # asyncio.run() has already cancelled the in-flight pages and closed the browser
+        log.warning("\n  Interrupted.")